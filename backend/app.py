@@ -1,16 +1,25 @@
 from flask import Flask, request, jsonify, render_template, redirect, url_for, session
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
+from jinja2 import FileSystemBytecodeCache
+import orjson
 import cv2
 import numpy as np
 import base64
+import hashlib
 import os
 import json
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeoutError
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
 import logging
 
 # Import our custom modules
 from models.database import DatabaseManager
-from models.face_recognition import FaceRecognitionSystem, FaceRecognitionUtils
+from models.face_recognition import (FaceRecognitionSystem, FaceRecognitionUtils,
+                                     init_recognition_worker, analyze_face_from_base64)
 from config import config
 
 # Get absolute paths for templates and static files
@@ -18,54 +27,71 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 TEMPLATE_DIR = os.path.abspath(os.path.join(BASE_DIR, '..', 'frontend', 'templates'))
 STATIC_DIR = os.path.abspath(os.path.join(BASE_DIR, '..', 'frontend', 'static'))
 
+class ORJSONProvider(DefaultJSONProvider):
+    """JSON provider that parses requests and serializes responses with orjson"""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(
+            obj,
+            default=self.default,
+            option=orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY
+        ).decode()
+    
+    def loads(self, s, **kwargs):
+        # orjson accepts the raw request bytes directly, no str decode needed
+        return orjson.loads(s)
+
 # Initialize Flask app with absolute paths
 app = Flask(__name__, 
            template_folder=TEMPLATE_DIR,
            static_folder=STATIC_DIR)
-
-# ============= SOLUTION 2: CACHE CLEARING CONFIGURATION =============
-# Force template auto-reload and cache clearing
-app.config['TEMPLATES_AUTO_RELOAD'] = True
-app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0
-
-# Enable Jinja auto-reload for development
-app.jinja_env.auto_reload = True
-app.jinja_env.cache = {}
-
-# Additional cache busting for development
-if True:  # Always enable for this fix
-    app.config['TEMPLATES_AUTO_RELOAD'] = True
-    app.config['EXPLAIN_TEMPLATE_LOADING'] = True
-    
-# Clear any existing template cache
-app.jinja_env.cache.clear()
-
-print("✅ Template cache clearing enabled")
-print("✅ Auto-reload configured for templates")
-# ================================================================
-
-# Debug: Print template and static folder paths
-print(f"✅ Template folder: {app.template_folder}")
-print(f"✅ Static folder: {app.static_folder}")
-
-# Verify dashboard template exists
-dashboard_path = os.path.join(app.template_folder, 'dashboard.html')
-print(f"✅ Dashboard template exists: {os.path.exists(dashboard_path)}")
-
-# Additional template verification
-template_files = ['index.html', 'login.html', 'register.html', 'dashboard.html', 'admin.html']
-for template in template_files:
-    template_path = os.path.join(app.template_folder, template)
-    exists = os.path.exists(template_path)
-    print(f"✅ {template}: {'Found' if exists else 'Missing'}")
+app.json = ORJSONProvider(app)
 
 # Load configuration
 env = os.environ.get('FLASK_ENV', 'development')
 app.config.from_object(config[env])
 
-# Force development mode cache settings
-app.config['TEMPLATES_AUTO_RELOAD'] = True
-app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0
+# ============= TEMPLATE & STATIC CACHE CONFIGURATION =============
+# Template auto-reload follows debug mode so production keeps compiled templates cached
+app.config['TEMPLATES_AUTO_RELOAD'] = app.debug
+app.jinja_env.auto_reload = app.debug
+
+# Static files are cached long-term outside debug; templates add a content hash to bust it
+if app.debug:
+    app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0
+# ================================================================
+
+def compute_static_hash():
+    """Hash the static folder contents so asset URLs change whenever a file does"""
+    digest = hashlib.md5()
+    for root, dirs, files in os.walk(app.static_folder):
+        dirs.sort()
+        for name in sorted(files):
+            with open(os.path.join(root, name), 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+STATIC_HASH = compute_static_hash()
+app.jinja_env.globals['STATIC_HASH'] = STATIC_HASH
+
+# Keep compiled template bytecode on disk so new processes skip the compile step. Without a
+# directory Jinja uses a per-user temp dir that it creates 0700 and refuses if another user
+# owns it, so nobody else can plant bytecode for us to execute
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache()
+
+# Template report for the Werkzeug dev server only; Jinja's loader raises
+# TemplateNotFound at request time, so production never stats template files
+if app.debug and os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+    # Debug: Print template and static folder paths
+    app.logger.debug("Template folder: %s", app.template_folder)
+    app.logger.debug("Static folder: %s", app.static_folder)
+
+    # Additional template verification
+    template_files = ['index.html', 'login.html', 'register.html', 'dashboard.html', 'admin.html']
+    for template in template_files:
+        template_path = os.path.join(app.template_folder, template)
+        exists = os.path.exists(template_path)
+        app.logger.debug("%s: %s", template, 'Found' if exists else 'Missing')
 
 # Initialize CORS
 CORS(app, resources={
@@ -76,22 +102,97 @@ CORS(app, resources={
     }
 })
 
+# Under `python app.py` in debug mode Werkzeug's reloader re-runs this module in a child
+# process (WERKZEUG_RUN_MAIN=true); the watching parent never serves requests
+IS_RELOADER_PARENT = (app.debug and __name__ == '__main__'
+                      and os.environ.get('WERKZEUG_RUN_MAIN') != 'true')
+
+# Recognition workers are spawned, not forked: by the first login this process already runs
+# threads (the login log writer, request threads) whose held locks a fork would copy.
+# A spawned worker re-imports the script the server was started from (as __mp_main__), and
+# that import must not open the database, load models or start a pool of its own.
+IS_RECOGNITION_WORKER = __name__ == '__mp_main__'
+
 # Initialize our systems
-db_manager = DatabaseManager()
-face_system = FaceRecognitionSystem(tolerance=app.config.get('FACE_RECOGNITION_TOLERANCE', 0.6))
+if not IS_RECOGNITION_WORKER:
+    db_manager = DatabaseManager()
+    face_system = FaceRecognitionSystem(tolerance=app.config.get('FACE_RECOGNITION_TOLERANCE', 0.9),
+                                        embedding_model_path=app.config.get('FACE_EMBEDDING_MODEL'),
+                                        detector_model_path=app.config.get('FACE_DETECTOR_MODEL'),
+                                        match_threads=app.config.get('MATCH_THREADS'))
+
+# Worker pool that decodes and encodes login images off the request thread
+recognition_workers = app.config.get('RECOGNITION_WORKERS', os.cpu_count()) or 0
+recognition_timeout = app.config.get('RECOGNITION_TIMEOUT')
+
+def create_recognizer_pool():
+    """Start a pool of spawned recognition worker processes"""
+    return ProcessPoolExecutor(
+        max_workers=recognition_workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=init_recognition_worker,
+        initargs=(app.config.get('FACE_RECOGNITION_TOLERANCE', 0.9),
+                  app.config.get('FACE_EMBEDDING_MODEL'), app.config.get('FACE_DETECTOR_MODEL'))
+    )
+
+recognizer_pool = (create_recognizer_pool()
+                   if recognition_workers > 0 and not IS_RECOGNITION_WORKER else None)
+recognizer_pool_lock = threading.Lock()  # Serializes replacing a broken pool
+recognizer_slots = threading.BoundedSemaphore(max(recognition_workers, 1))
+
+def analyze_probe_image(image_data):
+    """Decode, validate and encode a login image; runs inline when the pool is saturated or fails"""
+    global recognizer_pool
+    
+    pool = recognizer_pool
+    if pool is not None and recognizer_slots.acquire(blocking=False):
+        try:
+            return pool.submit(analyze_face_from_base64, image_data).result(timeout=recognition_timeout)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed) and took the pool with it; the first request
+            # to notice replaces the pool, and this one is analyzed inline
+            with recognizer_pool_lock:
+                if recognizer_pool is pool:
+                    app.logger.warning("Recognition worker pool broke; starting a new one")
+                    recognizer_pool = create_recognizer_pool()
+                    pool.shutdown(wait=False, cancel_futures=True)
+        except FuturesTimeoutError:
+            app.logger.warning("Recognition worker timed out after %ss; analyzing inline",
+                               recognition_timeout)
+        finally:
+            recognizer_slots.release()
+    
+    image = face_system.process_image_from_base64(image_data)
+    if image is None:
+        return None
+    return face_system.analyze_face(image)
 
 # Load existing face encodings on startup
 def load_known_faces():
-    """Load all known faces from database"""
+    """Load all known faces from database (cold start only; writes update incrementally)"""
     try:
-        encodings, employee_ids = db_manager.get_all_face_encodings()
-        face_system.load_known_faces(encodings, employee_ids)
-        print(f"✅ Loaded {len(encodings)} known faces on startup")
+        # Only encodings produced by the active encoder are comparable
+        encodings, scales, employee_ids = db_manager.get_all_face_encodings(dim=face_system.encoding_dim)
+        face_system.load_known_faces(encodings, employee_ids,
+                                     index_path=app.config.get('FAISS_INDEX_PATH'), scales=scales)
+        app.logger.info("Loaded %d known faces on startup", len(employee_ids))
     except Exception as e:
-        print(f"⚠️ Error loading known faces: {e}")
+        app.logger.warning("Error loading known faces: %s", e)
 
 # Initialize known faces
-load_known_faces()
+if not (IS_RELOADER_PARENT or IS_RECOGNITION_WORKER):
+    load_known_faces()
+
+def precompile_templates():
+    """Compile every template up front so the first request doesn't pay for it"""
+    for template_name in app.jinja_env.list_templates():
+        try:
+            app.jinja_env.get_template(template_name)
+        except Exception as e:
+            app.logger.warning("Could not precompile template %s: %s", template_name, e)
+
+if not (IS_RELOADER_PARENT or IS_RECOGNITION_WORKER):
+    precompile_templates()
 
 # Configure logging
 if not app.debug:
@@ -118,81 +219,60 @@ def static_test():
 def index():
     """Landing page"""
     try:
-        # Clear template cache before rendering
-        app.jinja_env.cache.clear()
         return render_template('index.html')
     except Exception as e:
-        print(f"❌ Error rendering index.html: {e}")
+        app.logger.error("Error rendering index.html: %s", e)
         return f"Template error: {str(e)}", 500
 
 @app.route('/login')
 def login_page():
     """Face recognition login page"""
     try:
-        # Clear template cache before rendering
-        app.jinja_env.cache.clear()
         return render_template('login.html')
     except Exception as e:
-        print(f"❌ Error rendering login.html: {e}")
+        app.logger.error("Error rendering login.html: %s", e)
         return f"Template error: {str(e)}", 500
 
 @app.route('/register')
 def register_page():
     """Employee registration page"""
     try:
-        # Clear template cache before rendering
-        app.jinja_env.cache.clear()
         return render_template('register.html')
     except Exception as e:
-        print(f"❌ Error rendering register.html: {e}")
+        app.logger.error("Error rendering register.html: %s", e)
         return f"Template error: {str(e)}", 500
 
 @app.route('/dashboard')
 def dashboard():
     """Employee dashboard (after successful login)"""
     try:
-        # Clear template cache before rendering
-        app.jinja_env.cache.clear()
-        
         employee_id = request.args.get('employee_id')
         if not employee_id:
-            print(f"⚠️ No employee_id provided, redirecting to login")
+            app.logger.debug("No employee_id provided, redirecting to login")
             return redirect(url_for('login_page'))
         
         # Get employee details
         employee = db_manager.get_employee_by_id(employee_id)
         if not employee:
-            print(f"⚠️ Employee {employee_id} not found, redirecting to login")
+            app.logger.debug("Employee %s not found, redirecting to login", employee_id)
             return redirect(url_for('login_page'))
         
         # Get recent login history
         login_history = db_manager.get_login_history(employee_id, limit=10)
         
-        # Verify template exists before rendering
-        dashboard_template = os.path.join(app.template_folder, 'dashboard.html')
-        if not os.path.exists(dashboard_template):
-            print(f"❌ Dashboard template not found at: {dashboard_template}")
-            return f"Dashboard template missing at: {dashboard_template}", 500
-        
-        print(f"✅ Rendering dashboard for employee: {employee['name']}")
-        print(f"✅ Using template: {dashboard_template}")
+        app.logger.debug("Rendering dashboard for employee: %s", employee['name'])
         
         return render_template('dashboard.html', 
                              employee=employee, 
                              login_history=login_history)
     except Exception as e:
-        print(f"❌ Error in dashboard route: {e}")
-        import traceback
-        traceback.print_exc()
+        app.logger.exception("Error in dashboard route: %s", e)
         return f"Dashboard error: {str(e)}", 500
 
 @app.route('/admin')
 def admin_panel():
     """Admin panel for managing employees"""
     try:
-        # Clear template cache before rendering
-        app.jinja_env.cache.clear()
-        
         employees = db_manager.get_all_employees()
         stats = db_manager.get_stats()
         recent_logins = db_manager.get_login_history(limit=20)
@@ -202,7 +282,7 @@ def admin_panel():
                              stats=stats,
                              recent_logins=recent_logins)
     except Exception as e:
-        print(f"❌ Error rendering admin.html: {e}")
+        app.logger.error("Error rendering admin.html: %s", e)
         return f"Template error: {str(e)}", 500
 
 # ============= API ENDPOINTS =============
@@ -211,7 +291,7 @@ def admin_panel():
 def api_recognize_face():
     """API endpoint for face recognition login"""
     try:
-        data = request.get_json()
+        data = request.get_json(cache=False)
         
         if not data or 'image' not in data:
             return jsonify({
@@ -219,17 +299,16 @@ def api_recognize_face():
                 'message': 'No image data provided'
             }), 400
         
-        # Process the image
-        image = face_system.process_image_from_base64(data['image'])
+        # Decode, validate and encode the image (in the worker pool when possible)
+        probe = analyze_probe_image(data['image'])
         
-        if image is None:
+        if probe is None:
             return jsonify({
                 'success': False,
                 'message': 'Invalid image format'
             }), 400
         
-        # Validate face quality
-        is_valid, quality_message = face_system.validate_face_quality(image)
+        is_valid, quality_message, unknown_encoding = probe
         
         if not is_valid:
             # Log failed attempt
@@ -247,10 +326,10 @@ def api_recognize_face():
                 'message': quality_message
             }), 400
         
-        # Attempt face recognition
-        employee_id, confidence = face_system.recognize_face(image)
+        # Match the encoding against known faces
+        employee_id, confidence = face_system.match_encoding(unknown_encoding)
         
-        min_confidence = app.config.get('MIN_CONFIDENCE_THRESHOLD', 0.7)
+        min_confidence = app.config.get('MIN_CONFIDENCE_THRESHOLD', 0.91)
         if employee_id and confidence > min_confidence:
             # Get employee details
             employee = db_manager.get_employee_by_id(employee_id)
@@ -269,7 +348,7 @@ def api_recognize_face():
                     'success': True,
                     'employee_id': employee_id,
                     'employee_name': employee['name'],
-                    'confidence': float(confidence),
+                    'confidence': confidence,
                     'message': f'Welcome back, {employee["name"]}! Confidence: {confidence:.1%}',
                     'redirect_url': f'/dashboard?employee_id={employee_id}'
                 })
@@ -291,30 +370,34 @@ def api_recognize_face():
         return jsonify({
             'success': False,
             'message': 'Face not recognized or confidence too low. Please try again.',
-            'confidence': float(confidence) if confidence else 0.0
+            'confidence': confidence or 0.0
         })
         
     except Exception as e:
-        app.logger.error(f"Error in face recognition: {str(e)}")
-        print(f"❌ Face recognition error: {str(e)}")
+        app.logger.error("Error in face recognition: %s", e)
         return jsonify({
             'success': False,
             'message': 'Internal server error during face recognition'
         }), 500
 
+# Fields the registration form must provide (non-empty)
+REQUIRED_FIELDS = ('employee_id', 'name', 'email', 'department', 'image')
+_REQUIRED = frozenset(REQUIRED_FIELDS)
+
 @app.route('/api/register', methods=['POST'])
 def api_register_employee():
     """API endpoint for employee registration"""
     try:
-        data = request.get_json()
+        data = request.get_json(cache=False)
         
-        required_fields = ['employee_id', 'name', 'email', 'department', 'image']
-        for field in required_fields:
-            if field not in data or not data[field]:
-                return jsonify({
-                    'success': False,
-                    'message': f'Missing required field: {field}'
-                }), 400
+        missing = _REQUIRED.difference(key for key, value in data.items() if value)
+        if missing:
+            # Report the first missing field in form order, as before
+            field = next(name for name in REQUIRED_FIELDS if name in missing)
+            return jsonify({
+                'success': False,
+                'message': f'Missing required field: {field}'
+            }), 400
         
         # Process the image
         image = face_system.process_image_from_base64(data['image'])
@@ -325,8 +408,8 @@ def api_register_employee():
                 'message': 'Invalid image format'
             }), 400
         
-        # Validate face quality
-        is_valid, quality_message = face_system.validate_face_quality(image)
+        # Validate face quality and generate the encoding from a single detection
+        is_valid, quality_message, face_encoding = face_system.analyze_face(image)
         
         if not is_valid:
             return jsonify({
@@ -334,9 +417,6 @@ def api_register_employee():
                 'message': quality_message
             }), 400
         
-        # Generate face encoding
-        face_encoding = face_system.encode_face(image)
-        
         if face_encoding is None:
             return jsonify({
                 'success': False,
@@ -353,8 +433,11 @@ def api_register_employee():
         )
         
         if success:
-            # Reload known faces to include the new employee
-            load_known_faces()
+            # Add the new employee to the in-memory gallery
+            face_system.add_encoding(data['employee_id'], face_encoding)
+            
+            # Persist the updated index so the next cold start can skip the rebuild
+            face_system.save_faiss_index(app.config.get('FAISS_INDEX_PATH'))
             
             return jsonify({
                 'success': True,
@@ -364,17 +447,81 @@ def api_register_employee():
         else:
             return jsonify({
                 'success': False,
-                'message': 'Failed to register employee. Employee ID or email might already exist.'
+                'message': 'Failed to register employee. Employee ID, email or face might already be registered.'
             }), 400
             
     except Exception as e:
-        app.logger.error(f"Error in employee registration: {str(e)}")
-        print(f"❌ Registration error: {str(e)}")
+        app.logger.error("Error in employee registration: %s", e)
         return jsonify({
             'success': False,
             'message': 'Internal server error during registration'
         }), 500
 
+@app.route('/api/employees/bulk', methods=['POST'])
+def api_register_employees_bulk():
+    """Admin endpoint: register many employees in a single transaction"""
+    try:
+        data = request.get_json(cache=False)
+        records = data.get('employees') if data else None
+        
+        if not records:
+            return jsonify({
+                'success': False,
+                'message': 'No employees provided'
+            }), 400
+        
+        rows = []
+        for position, record in enumerate(records, start=1):
+            missing = _REQUIRED.difference(key for key, value in record.items() if value)
+            if missing:
+                field = next(name for name in REQUIRED_FIELDS if name in missing)
+                return jsonify({
+                    'success': False,
+                    'message': f'Employee #{position}: missing required field: {field}'
+                }), 400
+            
+            # Decode, validate and encode the image (in the worker pool when possible)
+            probe = analyze_probe_image(record['image'])
+            if probe is None:
+                return jsonify({
+                    'success': False,
+                    'message': f'Employee {record["employee_id"]}: invalid image format'
+                }), 400
+            
+            is_valid, quality_message, face_encoding = probe
+            if not is_valid or face_encoding is None:
+                return jsonify({
+                    'success': False,
+                    'message': f'Employee {record["employee_id"]}: {quality_message}'
+                }), 400
+            
+            rows.append((record['employee_id'], record['name'], record['email'],
+                         record['department'], face_encoding))
+        
+        if not db_manager.add_employees_bulk(rows):
+            return jsonify({
+                'success': False,
+                'message': 'Failed to import employees. An employee ID, email or face might already be registered.'
+            }), 400
+        
+        # Add the new employees to the in-memory gallery, then persist the index once
+        for row in rows:
+            face_system.add_encoding(row[0], row[4])
+        face_system.save_faiss_index(app.config.get('FAISS_INDEX_PATH'))
+        
+        return jsonify({
+            'success': True,
+            'message': f'{len(rows)} employees registered successfully!',
+            'employee_ids': [row[0] for row in rows]
+        })
+        
+    except Exception as e:
+        app.logger.error("Error in bulk employee registration: %s", e)
+        return jsonify({
+            'success': False,
+            'message': 'Internal server error during bulk registration'
+        }), 500
+
 @app.route('/api/employees', methods=['GET'])
 def api_get_employees():
     """Get all employees"""
@@ -434,6 +581,55 @@ def api_update_employee(employee_id):
             'message': str(e)
         }), 500
 
+@app.route('/api/employees/<employee_id>/face', methods=['PUT'])
+def api_reenroll_employee_face(employee_id):
+    """Replace an employee's face encoding (e.g. after switching face encoders)"""
+    try:
+        data = request.get_json(cache=False)
+        
+        if not data or not data.get('image'):
+            return jsonify({
+                'success': False,
+                'message': 'Missing required field: image'
+            }), 400
+        
+        # Decode, validate and encode the image (in the worker pool when possible)
+        probe = analyze_probe_image(data['image'])
+        if probe is None:
+            return jsonify({
+                'success': False,
+                'message': 'Invalid image format'
+            }), 400
+        
+        is_valid, quality_message, face_encoding = probe
+        if not is_valid or face_encoding is None:
+            return jsonify({
+                'success': False,
+                'message': quality_message
+            }), 400
+        
+        if not db_manager.update_face_encoding(employee_id, face_encoding):
+            return jsonify({
+                'success': False,
+                'message': 'Failed to update face. The employee might be inactive or the face registered to someone else.'
+            }), 400
+        
+        # Swap the employee's encoding in the in-memory gallery
+        face_system.replace_encoding(employee_id, face_encoding)
+        face_system.save_faiss_index(app.config.get('FAISS_INDEX_PATH'))
+        
+        return jsonify({
+            'success': True,
+            'message': 'Face updated successfully'
+        })
+    
+    except Exception as e:
+        app.logger.error("Error in face re-enrollment: %s", e)
+        return jsonify({
+            'success': False,
+            'message': 'Internal server error during face update'
+        }), 500
+
 @app.route('/api/employees/<employee_id>', methods=['DELETE'])
 def api_delete_employee(employee_id):
     """Delete (deactivate) employee"""
@@ -441,8 +637,9 @@ def api_delete_employee(employee_id):
         success = db_manager.delete_employee(employee_id)
         
         if success:
-            # Reload known faces after deletion
-            load_known_faces()
+            # Drop the employee from the in-memory gallery
+            face_system.remove_encoding(employee_id)
+            face_system.save_faiss_index(app.config.get('FAISS_INDEX_PATH'))
             
             return jsonify({
                 'success': True,
@@ -520,7 +717,6 @@ def api_search_employees():
 @app.errorhandler(404)
 def not_found(error):
     try:
-        app.jinja_env.cache.clear()
         return render_template('404.html'), 404
     except:
         return "404 - Page Not Found", 404
@@ -528,7 +724,6 @@ def not_found(error):
 @app.errorhandler(500)
 def internal_error(error):
     try:
-        app.jinja_env.cache.clear()
         return render_template('500.html'), 500
     except:
         return "500 - Internal Server Error", 500
@@ -545,27 +740,19 @@ def create_directories():
     
     for directory in directories:
         os.makedirs(directory, exist_ok=True)
-        print(f"✅ Directory created/verified: {directory}")
+        app.logger.debug("Directory created/verified: %s", directory)
 
 if __name__ == '__main__':
     try:
-        # Create necessary directories
-        create_directories()
-        
-        # Initialize database
-        db_manager.init_database()
-        
-        # Load known faces
-        load_known_faces()
-        
-        print("🚀 Face Recognition Employee Login System starting...")
-        print(f"📊 Loaded {len(face_system.known_encodings)} known face encodings")
-        print(f"🌐 Server running at: http://localhost:5000")
-        print(f"🔗 Access your application at: http://127.0.0.1:5000")
-        
-        # Final cache clear before starting
-        app.jinja_env.cache.clear()
-        print("✅ Template cache cleared before startup")
+        # Database and known faces were already initialized at import time
+        if not IS_RELOADER_PARENT:
+            # Create necessary directories
+            create_directories()
+            
+            print("🚀 Face Recognition Employee Login System starting...")
+            print(f"📊 Loaded {len(face_system.known_employee_ids)} known face encodings")
+            print(f"🌐 Server running at: http://localhost:5000")
+            print(f"🔗 Access your application at: http://127.0.0.1:5000")
         
         # Run the Flask application
         app.run(
@@ -21,10 +21,21 @@ class Config:
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
     
     # Face recognition settings
-    FACE_RECOGNITION_TOLERANCE = 0.6
-    MIN_CONFIDENCE_THRESHOLD = 0.7
+    # Confidence is the cosine similarity of L2-normalized encodings (-1 to 1)
+    FACE_RECOGNITION_TOLERANCE = 0.9
+    MIN_CONFIDENCE_THRESHOLD = 0.91
     FACE_DETECTION_SCALE_FACTOR = 1.1
     MIN_NEIGHBORS = 5
+    FAISS_INDEX_PATH = 'backend/data/known_faces.index'  # Used only when faiss is installed
+    RECOGNITION_WORKERS = os.cpu_count()  # Processes encoding login images (0 = inline)
+    RECOGNITION_TIMEOUT = 10  # Seconds to wait for a worker before encoding inline
+    MATCH_THREADS = os.cpu_count()  # Threads scoring large galleries when faiss is not installed
+    # ONNX face embedding model (e.g. MobileFaceNet, 112x112 input); pixel encodings are used
+    # when the file is missing. Employees registered under the other encoder must re-enroll
+    # through PUT /api/employees/<id>/face.
+    FACE_EMBEDDING_MODEL = 'backend/data/models/mobilefacenet.onnx'
+    # YuNet face detector (cv2.FaceDetectorYN); the Haar cascade is used when the file is missing
+    FACE_DETECTOR_MODEL = 'backend/data/models/face_detection_yunet_2023mar.onnx'
     
     # Security settings
     SESSION_TIMEOUT = 3600  # 1 hour in seconds
@@ -46,11 +57,13 @@ class DevelopmentConfig(Config):
     """Development configuration"""
     DEBUG = True
     ENV = 'development'
+    SEND_FILE_MAX_AGE_DEFAULT = 0
 
 class ProductionConfig(Config):
     """Production configuration"""
     DEBUG = False
     ENV = 'production'
+    SEND_FILE_MAX_AGE_DEFAULT = 31536000  # One year; asset URLs carry a content hash
     SECRET_KEY = os.environ.get('SECRET_KEY')
     
     @classmethod
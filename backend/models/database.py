@@ -1,257 +1,549 @@
 import sqlite3
-import json
+import orjson
 import numpy as np
 import os
 from datetime import datetime
 from typing import Optional, List, Tuple
 import hashlib
+import atexit
+from collections import OrderedDict
+from contextlib import contextmanager
+import queue
+import threading
+import time
+
+try:
+    from .quantization import quantize
+except ImportError:  # run directly as a script
+    from quantization import quantize
+
+# Employee columns returned to callers (face_encoding is a binary blob and stays internal)
+EMPLOYEE_COLUMNS = (
+    "id, employee_id, name, email, department, photo_path, "
+    "is_active, created_at, updated_at"
+)
 
 class DatabaseManager:
     """Handles all database operations for the face recognition system"""
     
+    # Seconds that get_stats() results are reused before querying again
+    STATS_CACHE_TTL = 5.0
+    
+    # Most recently used employee records kept by get_employee_by_id()
+    EMPLOYEE_CACHE_SIZE = 512
+    
+    # PRAGMA user_version from which encoding_hash holds BLAKE2b digests
+    ENCODING_HASH_VERSION = 1
+    
+    # Queued login attempts are committed every LOG_FLUSH_INTERVAL seconds,
+    # or as soon as LOG_BATCH_SIZE of them are waiting
+    LOG_FLUSH_INTERVAL = 0.1
+    LOG_BATCH_SIZE = 64
+    
+    # Most SQLite connections open at once, however many threads the server runs
+    CONNECTION_POOL_SIZE = 8
+    
     def __init__(self, db_path: str = "face_recognition.db"):
         self.db_path = db_path
+        self._stats_cache = None  # (expires_at, stats)
+        self._emp_cache = OrderedDict()  # employee_id -> employee dict, oldest first
+        self._emp_cache_lock = threading.Lock()
+        self._emp_cache_generation = 0  # Bumped by every invalidation
+        
+        # Connections are shared by request threads through a bounded pool; the slots start
+        # empty (None) and are opened on first use, most recently returned first
+        self._pool = queue.LifoQueue()
+        for _ in range(self.CONNECTION_POOL_SIZE):
+            self._pool.put(None)
+        
         self.init_database()
+        
+        # Login attempts are queued and written in batches off the request thread
+        self._login_queue = queue.Queue()
+        self._login_lock = threading.Lock()
+        self._login_batch_ready = threading.Event()
+        self._login_writer = threading.Thread(target=self._login_log_writer,
+                                              name='login-log-writer', daemon=True)
+        self._login_writer.start()
+        atexit.register(self.flush_login_logs)
     
-    def get_connection(self):
-        """Get database connection"""
-        conn = sqlite3.connect(self.db_path)
+    def _connect(self) -> sqlite3.Connection:
+        """Open a tuned connection that any thread may use (one at a time, via the pool)"""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
         conn.row_factory = sqlite3.Row  # This allows accessing columns by name
+        
+        # Per-connection tuning; WAL (set in init_database) makes NORMAL sync safe
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA mmap_size=268435456")
         return conn
     
+    @contextmanager
+    def connection(self):
+        """Borrow a pooled connection, waiting while all CONNECTION_POOL_SIZE are in use"""
+        conn = self._pool.get()
+        try:
+            if conn is None:
+                conn = self._connect()
+            yield conn
+        finally:
+            # Never hand the next borrower a half-finished transaction
+            if conn is not None and conn.in_transaction:
+                conn.rollback()
+            self._pool.put(conn)
+    
     def init_database(self):
         """Initialize database with required tables"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        # Create employees table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS employees (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                employee_id TEXT UNIQUE NOT NULL,
-                name TEXT NOT NULL,
-                email TEXT UNIQUE NOT NULL,
-                department TEXT,
-                face_encoding TEXT,  -- JSON string of face encoding array
-                photo_path TEXT,
-                is_active BOOLEAN DEFAULT 1,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            # WAL lets readers run alongside the writer; the setting persists in the file
+            cursor.execute("PRAGMA journal_mode=WAL")
+            
+            # Create employees table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS employees (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    employee_id TEXT UNIQUE NOT NULL,
+                    name TEXT NOT NULL,
+                    email TEXT UNIQUE NOT NULL,
+                    department TEXT,
+                    face_encoding BLOB,  -- int8 bytes of face encoding (value ~= q * encoding_scale)
+                    encoding_scale REAL,  -- Per-encoding dequantization scale
+                    encoding_hash TEXT,  -- Hash of face_encoding for duplicate detection
+                    photo_path TEXT,
+                    is_active BOOLEAN DEFAULT 1,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # Create login_logs table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS login_logs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    employee_id TEXT,
+                    login_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    confidence_score REAL,
+                    ip_address TEXT,
+                    user_agent TEXT,
+                    success BOOLEAN DEFAULT 1,
+                    failure_reason TEXT,
+                    FOREIGN KEY (employee_id) REFERENCES employees (employee_id)
+                )
+            ''')
+            
+            # Create admin_users table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS admin_users (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    username TEXT UNIQUE NOT NULL,
+                    password_hash TEXT NOT NULL,
+                    email TEXT UNIQUE NOT NULL,
+                    is_active BOOLEAN DEFAULT 1,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # Indexes for per-employee history and date-bounded log scans
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_login_logs_emp_time ON login_logs(employee_id, login_time DESC)"
             )
-        ''')
-        
-        # Create login_logs table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS login_logs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                employee_id TEXT,
-                login_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                confidence_score REAL,
-                ip_address TEXT,
-                user_agent TEXT,
-                success BOOLEAN DEFAULT 1,
-                failure_reason TEXT,
-                FOREIGN KEY (employee_id) REFERENCES employees (employee_id)
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_login_logs_time ON login_logs(login_time)"
             )
-        ''')
-        
-        # Create face_encodings table (for faster face matching)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS face_encodings (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                employee_id TEXT NOT NULL,
-                encoding_data TEXT NOT NULL,  -- JSON array of face encoding
-                encoding_hash TEXT NOT NULL,  -- Hash for quick comparison
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (employee_id) REFERENCES employees (employee_id)
+            
+            # Columns added after the first release
+            self._add_missing_column(cursor, 'employees', 'encoding_scale', 'REAL')
+            self._add_missing_column(cursor, 'employees', 'encoding_hash', 'TEXT')
+            
+            # One-time upgrades of encodings stored as JSON text or float32 by older versions
+            self._migrate_json_encodings(cursor)
+            self._migrate_float_encodings(cursor)
+            
+            # Encodings now live only on employees; the old side table is dropped
+            self._migrate_encoding_hashes(cursor)
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_employees_active_encoding_hash "
+                "ON employees(encoding_hash) WHERE is_active = 1"
             )
-        ''')
+            
+            conn.commit()
+            print("✅ Database initialized successfully")
+    
+    def _migrate_json_encodings(self, cursor):
+        """Rewrite JSON-text face encodings as raw float32 BLOBs"""
+        cursor.execute(
+            "SELECT id, face_encoding FROM employees WHERE typeof(face_encoding) = 'text'"
+        )
+        employee_rows = [
+            (sqlite3.Binary(np.array(orjson.loads(row['face_encoding']), dtype=np.float32).tobytes()), row['id'])
+            for row in cursor.fetchall()
+        ]
+        cursor.executemany("UPDATE employees SET face_encoding = ? WHERE id = ?", employee_rows)
         
-        # Create admin_users table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS admin_users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                password_hash TEXT NOT NULL,
-                email TEXT UNIQUE NOT NULL,
-                is_active BOOLEAN DEFAULT 1,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
+        if employee_rows:
+            print(f"✅ Migrated {len(employee_rows)} face encodings from JSON to binary")
+    
+    def _migrate_float_encodings(self, cursor):
+        """Quantize float32 face encodings (rows without a scale) to int8"""
+        cursor.execute(
+            "SELECT id, face_encoding FROM employees "
+            "WHERE encoding_scale IS NULL AND face_encoding IS NOT NULL"
+        )
+        employee_rows = []
+        for row in cursor.fetchall():
+            encoding_bytes, scale = self._quantize_encoding(
+                np.frombuffer(row['face_encoding'], dtype=np.float32))
+            employee_rows.append((sqlite3.Binary(encoding_bytes), scale,
+                                  self._encoding_hash(encoding_bytes), row['id']))
+        cursor.executemany(
+            "UPDATE employees SET face_encoding = ?, encoding_scale = ?, encoding_hash = ? WHERE id = ?",
+            employee_rows
+        )
+        
+        if employee_rows:
+            print(f"✅ Quantized {len(employee_rows)} face encodings to int8")
+    
+    @staticmethod
+    def _add_missing_column(cursor, table: str, column: str, declaration: str):
+        """Add a column to an existing table unless it is already there"""
+        columns = {row['name'] for row in cursor.execute(f"PRAGMA table_info({table})")}
+        if column not in columns:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+    
+    def _migrate_encoding_hashes(self, cursor):
+        """Move encoding hashes onto employees and drop the face_encodings table"""
+        # Databases before user_version 1 hold MD5 hashes; recompute every hash once
+        version = cursor.execute("PRAGMA user_version").fetchone()[0]
+        where = "face_encoding IS NOT NULL"
+        if version >= self.ENCODING_HASH_VERSION:
+            where += " AND encoding_hash IS NULL"
+        
+        cursor.execute(f"SELECT id, face_encoding FROM employees WHERE {where}")
+        hash_rows = [(self._encoding_hash(row['face_encoding']), row['id'])
+                     for row in cursor.fetchall()]
+        cursor.executemany("UPDATE employees SET encoding_hash = ? WHERE id = ?", hash_rows)
+        cursor.execute(f"PRAGMA user_version = {self.ENCODING_HASH_VERSION}")
         
-        conn.commit()
-        conn.close()
-        print("✅ Database initialized successfully")
+        cursor.execute("DROP TABLE IF EXISTS face_encodings")
+    
+    @staticmethod
+    def _quantize_encoding(face_encoding: np.ndarray) -> Tuple[bytes, float]:
+        """int8 bytes and scale stored for one face encoding"""
+        quantized, scale = quantize(face_encoding)
+        return quantized.tobytes(), scale
+    
+    @staticmethod
+    def _encoding_hash(encoding_bytes: bytes) -> str:
+        """Hash of raw encoding bytes used to reject duplicate registrations"""
+        return hashlib.blake2b(encoding_bytes, digest_size=16).hexdigest()
+    
+    @staticmethod
+    def _find_registered_encoding(conn, encoding_hashes: List[str],
+                                  exclude_employee_id: Optional[str] = None) -> Optional[str]:
+        """Employee ID of an active employee already holding one of these encodings"""
+        for encoding_hash in encoding_hashes:
+            row = conn.execute('''
+                SELECT employee_id FROM employees
+                WHERE is_active = 1 AND encoding_hash = ? AND employee_id IS NOT ?
+            ''', (encoding_hash, exclude_employee_id)).fetchone()
+            if row:
+                return row['employee_id']
+        return None
     
     def add_employee(self, employee_id: str, name: str, email: str, 
                     department: str, face_encoding: np.ndarray, 
                     photo_path: str = None) -> bool:
         """Add new employee with face encoding"""
-        try:
-            conn = self.get_connection()
+        return self.add_employees_bulk(
+            [(employee_id, name, email, department, face_encoding, photo_path)]
+        )
+    
+    def add_employees_bulk(self, employees: List[tuple]) -> bool:
+        """Add (employee_id, name, email, department, face_encoding[, photo_path]) rows in one transaction"""
+        with self.connection() as conn:
+            try:
+                rows = []
+                for employee in employees:
+                    employee_id, name, email, department, face_encoding = employee[:5]
+                    photo_path = employee[5] if len(employee) > 5 else None
+                    
+                    # Store the encoding as int8 bytes plus scale, hashed for duplicate detection
+                    encoding_bytes, scale = self._quantize_encoding(face_encoding)
+                    rows.append((employee_id, name, email, department,
+                                 sqlite3.Binary(encoding_bytes), scale,
+                                 self._encoding_hash(encoding_bytes), photo_path))
+                
+                # All rows commit together, or none do
+                with conn:
+                    # Take the write lock first so the duplicate check and the insert can't interleave
+                    conn.execute("BEGIN IMMEDIATE")
+                    
+                    encoding_hashes = [row[6] for row in rows]
+                    duplicate_of = self._find_registered_encoding(conn, encoding_hashes)
+                    if duplicate_of is not None:
+                        raise sqlite3.IntegrityError(f"face is already registered to {duplicate_of}")
+                    if len(set(encoding_hashes)) != len(encoding_hashes):
+                        raise sqlite3.IntegrityError("the same face appears twice in the import")
+                    
+                    conn.executemany('''
+                        INSERT INTO employees 
+                        (employee_id, name, email, department, face_encoding, encoding_scale,
+                         encoding_hash, photo_path)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', rows)
+                
+                for row in rows:
+                    self.invalidate_employee_cache(row[0])
+                print(f"✅ Added {len(rows)} employee(s) successfully")
+                return True
+                
+            except sqlite3.IntegrityError as e:
+                print(f"❌ Employee or face already exists: {e}")
+                return False
+            except Exception as e:
+                conn.rollback()
+                print(f"❌ Error adding employees: {e}")
+                return False
+    
+    def update_face_encoding(self, employee_id: str, face_encoding: np.ndarray) -> bool:
+        """Replace an active employee's face encoding (re-enrollment)"""
+        with self.connection() as conn:
+            try:
+                encoding_bytes, scale = self._quantize_encoding(face_encoding)
+                encoding_hash = self._encoding_hash(encoding_bytes)
+                
+                with conn:
+                    conn.execute("BEGIN IMMEDIATE")
+                    
+                    duplicate_of = self._find_registered_encoding(conn, [encoding_hash], employee_id)
+                    if duplicate_of is not None:
+                        raise sqlite3.IntegrityError(f"face is already registered to {duplicate_of}")
+                    
+                    cursor = conn.execute('''
+                        UPDATE employees
+                        SET face_encoding = ?, encoding_scale = ?, encoding_hash = ?, updated_at = ?
+                        WHERE employee_id = ? AND is_active = 1
+                    ''', (sqlite3.Binary(encoding_bytes), scale, encoding_hash, datetime.now(), employee_id))
+                
+                self.invalidate_employee_cache(employee_id)
+                return cursor.rowcount > 0
+            
+            except sqlite3.IntegrityError as e:
+                print(f"❌ Face already exists: {e}")
+                return False
+            except Exception as e:
+                conn.rollback()
+                print(f"❌ Error updating face encoding: {e}")
+                return False
+    
+    def get_all_face_encodings(self, dim: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+        """Retrieve all face encodings as one (N, D) int8 matrix, per-row scales and employee IDs
+        
+        When dim is given, encodings of any other length (e.g. made by a different
+        encoder) are skipped with a warning; those employees need to re-enroll.
+        """
+        with self.connection() as conn:
             cursor = conn.cursor()
             
-            # Convert numpy array to JSON string
-            encoding_json = json.dumps(face_encoding.tolist())
+            where = "is_active = 1 AND face_encoding IS NOT NULL"
+            params = ()
+            if dim is not None:
+                cursor.execute(
+                    f"SELECT COUNT(*) AS skipped FROM employees WHERE {where} AND length(face_encoding) != ?",
+                    (dim,)
+                )
+                skipped = cursor.fetchone()['skipped']
+                if skipped:
+                    print(f"⚠️ Skipped {skipped} face encoding(s) made by a different encoder; "
+                          f"those employees must re-enroll their face")
+                
+                where += " AND length(face_encoding) = ?"
+                params = (dim,)
             
-            # Create hash of encoding for quick comparison
-            encoding_hash = hashlib.md5(encoding_json.encode()).hexdigest()
+            cursor.execute(f"SELECT COUNT(*) AS total FROM employees WHERE {where}", params)
+            total = cursor.fetchone()['total']
             
-            # Insert employee
-            cursor.execute('''
-                INSERT INTO employees 
-                (employee_id, name, email, department, face_encoding, photo_path)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (employee_id, name, email, department, encoding_json, photo_path))
+            cursor.execute(
+                # Registration order, which is also the order the gallery appends new faces in,
+                # so a persisted FAISS index still lines up on the next start
+                f"SELECT employee_id, face_encoding, encoding_scale FROM employees WHERE {where} ORDER BY id",
+                params
+            )
             
-            # Insert face encoding for faster lookup
-            cursor.execute('''
-                INSERT INTO face_encodings 
-                (employee_id, encoding_data, encoding_hash)
-                VALUES (?, ?, ?)
-            ''', (employee_id, encoding_json, encoding_hash))
+            matrix = None
+            scales = np.empty(total, dtype=np.float32)
+            employee_ids = []
             
-            conn.commit()
-            conn.close()
-            print(f"✅ Employee {employee_id} added successfully")
-            return True
+            for row in cursor:
+                try:
+                    encoding = np.frombuffer(row['face_encoding'], dtype=np.int8)
+                    
+                    # Size the matrix from the first encoding, then fill rows in place
+                    if matrix is None:
+                        matrix = np.empty((total, encoding.shape[0]), dtype=np.int8)
+                    
+                    if encoding.shape[0] != matrix.shape[1] or len(employee_ids) >= total:
+                        raise ValueError(f"unexpected encoding size {encoding.shape[0]}")
+                    
+                    matrix[len(employee_ids)] = encoding
+                    scales[len(employee_ids)] = row['encoding_scale']
+                    employee_ids.append(row['employee_id'])
+                except Exception as e:
+                    print(f"⚠️ Error loading encoding for {row['employee_id']}: {e}")
+                    continue
             
-        except sqlite3.IntegrityError as e:
-            print(f"❌ Employee {employee_id} already exists: {e}")
-            return False
-        except Exception as e:
-            print(f"❌ Error adding employee: {e}")
-            return False
-    
-    def get_all_face_encodings(self) -> Tuple[List[np.ndarray], List[str]]:
-        """Retrieve all face encodings and corresponding employee IDs"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT e.employee_id, fe.encoding_data 
-            FROM employees e
-            JOIN face_encodings fe ON e.employee_id = fe.employee_id
-            WHERE e.is_active = 1
-        ''')
-        
-        results = cursor.fetchall()
-        conn.close()
-        
-        encodings = []
-        employee_ids = []
-        
-        for row in results:
-            try:
-                # Convert JSON back to numpy array
-                encoding = np.array(json.loads(row['encoding_data']))
-                encodings.append(encoding)
-                employee_ids.append(row['employee_id'])
-            except Exception as e:
-                print(f"⚠️ Error loading encoding for {row['employee_id']}: {e}")
-                continue
-        
-        return encodings, employee_ids
+            if matrix is None:
+                return np.empty((0, 0), dtype=np.int8), np.empty(0, dtype=np.float32), []
+            
+            return matrix[:len(employee_ids)], scales[:len(employee_ids)], employee_ids
     
     def get_employee_by_id(self, employee_id: str) -> Optional[dict]:
-        """Get employee details by employee ID"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT * FROM employees WHERE employee_id = ? AND is_active = 1
-        ''', (employee_id,))
-        
-        result = cursor.fetchone()
-        conn.close()
+        """Get employee details by employee ID (cached; see invalidate_employee_cache)"""
+        with self._emp_cache_lock:
+            employee = self._emp_cache.get(employee_id)
+            if employee is not None:
+                self._emp_cache.move_to_end(employee_id)
+                return employee
+            generation = self._emp_cache_generation
         
-        if result:
-            return dict(result)
-        return None
-    
-    def log_login_attempt(self, employee_id: str = None, confidence: float = 0.0, 
-                         success: bool = True, ip_address: str = None,
-                         user_agent: str = None, failure_reason: str = None) -> bool:
-        """Log login attempt"""
-        try:
-            conn = self.get_connection()
+        with self.connection() as conn:
             cursor = conn.cursor()
             
-            cursor.execute('''
-                INSERT INTO login_logs 
-                (employee_id, confidence_score, success, ip_address, user_agent, failure_reason)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (employee_id, confidence, success, ip_address, user_agent, failure_reason))
+            cursor.execute(f'''
+                SELECT {EMPLOYEE_COLUMNS} FROM employees WHERE employee_id = ? AND is_active = 1
+            ''', (employee_id,))
             
-            conn.commit()
-            conn.close()
-            return True
+            result = cursor.fetchone()
             
-        except Exception as e:
-            print(f"❌ Error logging login attempt: {e}")
-            return False
+            if result:
+                employee = dict(result)
+                with self._emp_cache_lock:
+                    # Skip the fill if the employee data changed while we were reading it
+                    if generation == self._emp_cache_generation:
+                        self._emp_cache[employee_id] = employee
+                        if len(self._emp_cache) > self.EMPLOYEE_CACHE_SIZE:
+                            self._emp_cache.popitem(last=False)
+                return employee
+            return None
     
-    def get_login_history(self, employee_id: str = None, limit: int = 50) -> List[dict]:
-        """Get login history for an employee or all employees"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        if employee_id:
-            cursor.execute('''
-                SELECT ll.*, e.name 
-                FROM login_logs ll
-                LEFT JOIN employees e ON ll.employee_id = e.employee_id
-                WHERE ll.employee_id = ?
-                ORDER BY ll.login_time DESC
-                LIMIT ?
-            ''', (employee_id, limit))
-        else:
-            cursor.execute('''
-                SELECT ll.*, e.name 
-                FROM login_logs ll
-                LEFT JOIN employees e ON ll.employee_id = e.employee_id
-                ORDER BY ll.login_time DESC
-                LIMIT ?
-            ''', (limit,))
+    def log_login_attempt(self, employee_id: str = None, confidence: float = 0.0, 
+                         success: bool = True, ip_address: str = None,
+                         user_agent: str = None, failure_reason: str = None) -> bool:
+        """Queue a login attempt; the background writer commits it in a batch"""
+        # Stamp the attempt now (same format as CURRENT_TIMESTAMP) so batching doesn't skew it
+        login_time = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())
+        self._login_queue.put((employee_id, login_time, confidence, success,
+                               ip_address, user_agent, failure_reason))
         
-        results = cursor.fetchall()
-        conn.close()
+        if self._login_queue.qsize() >= self.LOG_BATCH_SIZE:
+            self._login_batch_ready.set()
+        return True
+    
+    def flush_login_logs(self) -> bool:
+        """Write any queued login attempts immediately"""
+        with self._login_lock:
+            return self._write_login_logs(self._drain_login_queue())
+    
+    def _drain_login_queue(self) -> List[tuple]:
+        """Take every login attempt currently waiting in the queue"""
+        rows = []
+        while True:
+            try:
+                rows.append(self._login_queue.get_nowait())
+            except queue.Empty:
+                return rows
+    
+    def _login_log_writer(self):
+        """Background loop that commits queued login attempts in batches"""
+        while True:
+            self._login_batch_ready.wait(self.LOG_FLUSH_INTERVAL)
+            self._login_batch_ready.clear()
+            self.flush_login_logs()
+    
+    def _write_login_logs(self, rows: List[tuple]) -> bool:
+        """Insert a batch of login attempts in one transaction"""
+        if not rows:
+            return True
         
-        return [dict(row) for row in results]
+        with self.connection() as conn:
+            try:
+                conn.executemany('''
+                    INSERT INTO login_logs 
+                    (employee_id, login_time, confidence_score, success, ip_address, user_agent, failure_reason)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', rows)
+                
+                conn.commit()
+                return True
+                
+            except Exception as e:
+                conn.rollback()
+                print(f"❌ Error logging login attempts: {e}")
+                return False
     
-    def update_employee(self, employee_id: str, **kwargs) -> bool:
-        """Update employee information"""
-        try:
-            conn = self.get_connection()
+    def get_login_history(self, employee_id: str = None, limit: int = 50) -> List[dict]:
+        """Get login history for an employee or all employees"""
+        with self.connection() as conn:
             cursor = conn.cursor()
             
-            # Build dynamic update query
-            update_fields = []
-            values = []
+            if employee_id:
+                cursor.execute('''
+                    SELECT ll.*, e.name 
+                    FROM login_logs ll
+                    LEFT JOIN employees e ON ll.employee_id = e.employee_id
+                    WHERE ll.employee_id = ?
+                    ORDER BY ll.login_time DESC
+                    LIMIT ?
+                ''', (employee_id, limit))
+            else:
+                cursor.execute('''
+                    SELECT ll.*, e.name 
+                    FROM login_logs ll
+                    LEFT JOIN employees e ON ll.employee_id = e.employee_id
+                    ORDER BY ll.login_time DESC
+                    LIMIT ?
+                ''', (limit,))
             
-            for key, value in kwargs.items():
-                if key in ['name', 'email', 'department', 'is_active']:
-                    update_fields.append(f"{key} = ?")
-                    values.append(value)
+            results = cursor.fetchall()
             
-            if not update_fields:
+            return [dict(row) for row in results]
+    
+    def update_employee(self, employee_id: str, **kwargs) -> bool:
+        """Update employee information"""
+        with self.connection() as conn:
+            try:
+                cursor = conn.cursor()
+                
+                # Build dynamic update query
+                update_fields = []
+                values = []
+                
+                for key, value in kwargs.items():
+                    if key in ['name', 'email', 'department', 'is_active']:
+                        update_fields.append(f"{key} = ?")
+                        values.append(value)
+                
+                if not update_fields:
+                    return False
+                
+                # Add updated_at timestamp
+                update_fields.append("updated_at = ?")
+                values.append(datetime.now())
+                values.append(employee_id)
+                
+                query = f"UPDATE employees SET {', '.join(update_fields)} WHERE employee_id = ?"
+                cursor.execute(query, values)
+                
+                conn.commit()
+                self.invalidate_employee_cache(employee_id)
+                return True
+                
+            except Exception as e:
+                conn.rollback()
+                print(f"❌ Error updating employee: {e}")
                 return False
-            
-            # Add updated_at timestamp
-            update_fields.append("updated_at = ?")
-            values.append(datetime.now())
-            values.append(employee_id)
-            
-            query = f"UPDATE employees SET {', '.join(update_fields)} WHERE employee_id = ?"
-            cursor.execute(query, values)
-            
-            conn.commit()
-            conn.close()
-            return True
-            
-        except Exception as e:
-            print(f"❌ Error updating employee: {e}")
-            return False
     
     def delete_employee(self, employee_id: str) -> bool:
         """Soft delete employee (set is_active to False)"""
@@ -259,85 +551,106 @@ class DatabaseManager:
     
     def get_all_employees(self, active_only: bool = True) -> List[dict]:
         """Get all employees"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        if active_only:
-            cursor.execute("SELECT * FROM employees WHERE is_active = 1 ORDER BY name")
-        else:
-            cursor.execute("SELECT * FROM employees ORDER BY name")
-        
-        results = cursor.fetchall()
-        conn.close()
-        
-        return [dict(row) for row in results]
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            if active_only:
+                cursor.execute(f"SELECT {EMPLOYEE_COLUMNS} FROM employees WHERE is_active = 1 ORDER BY name")
+            else:
+                cursor.execute(f"SELECT {EMPLOYEE_COLUMNS} FROM employees ORDER BY name")
+            
+            results = cursor.fetchall()
+            
+            return [dict(row) for row in results]
     
     def search_employees(self, query: str) -> List[dict]:
         """Search employees by name, email, or employee_id"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        search_pattern = f"%{query}%"
-        cursor.execute('''
-            SELECT * FROM employees 
-            WHERE (name LIKE ? OR email LIKE ? OR employee_id LIKE ?)
-            AND is_active = 1
-            ORDER BY name
-        ''', (search_pattern, search_pattern, search_pattern))
-        
-        results = cursor.fetchall()
-        conn.close()
-        
-        return [dict(row) for row in results]
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            search_pattern = f"%{query}%"
+            cursor.execute(f'''
+                SELECT {EMPLOYEE_COLUMNS} FROM employees 
+                WHERE (name LIKE ? OR email LIKE ? OR employee_id LIKE ?)
+                AND is_active = 1
+                ORDER BY name
+            ''', (search_pattern, search_pattern, search_pattern))
+            
+            results = cursor.fetchall()
+            
+            return [dict(row) for row in results]
+    
+    def invalidate_employee_cache(self, employee_id: Optional[str] = None):
+        """Drop the cached lookup for one employee (or all) and stats after employee data changes"""
+        with self._emp_cache_lock:
+            self._emp_cache_generation += 1
+            if employee_id is None:
+                self._emp_cache.clear()
+            else:
+                self._emp_cache.pop(employee_id, None)
+        self._stats_cache = None
     
     def get_stats(self) -> dict:
-        """Get system statistics"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        # Total active employees
-        cursor.execute("SELECT COUNT(*) as total FROM employees WHERE is_active = 1")
-        total_employees = cursor.fetchone()['total']
-        
-        # Total logins today
-        cursor.execute('''
-            SELECT COUNT(*) as today_logins 
-            FROM login_logs 
-            WHERE DATE(login_time) = DATE('now') AND success = 1
-        ''')
-        today_logins = cursor.fetchone()['today_logins']
-        
-        # Failed attempts today
-        cursor.execute('''
-            SELECT COUNT(*) as failed_attempts 
-            FROM login_logs 
-            WHERE DATE(login_time) = DATE('now') AND success = 0
-        ''')
-        failed_attempts = cursor.fetchone()['failed_attempts']
-        
-        # Most recent login
-        cursor.execute('''
-            SELECT ll.login_time, e.name 
-            FROM login_logs ll
-            JOIN employees e ON ll.employee_id = e.employee_id
-            WHERE ll.success = 1
-            ORDER BY ll.login_time DESC
-            LIMIT 1
-        ''')
-        recent_login = cursor.fetchone()
+        """Get system statistics, reusing the last result for STATS_CACHE_TTL seconds"""
+        cached = self._stats_cache
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
         
-        conn.close()
-        
-        return {
-            'total_employees': total_employees,
-            'today_logins': today_logins,
-            'failed_attempts': failed_attempts,
-            'recent_login': dict(recent_login) if recent_login else None
-        }
+        stats = self._query_stats()
+        self._stats_cache = (time.monotonic() + self.STATS_CACHE_TTL, stats)
+        return stats
+    
+    def _query_stats(self) -> dict:
+        """Run the statistics queries"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            # Active employees plus today's successful and failed logins in one pass
+            cursor.execute('''
+                SELECT
+                    (SELECT COUNT(*) FROM employees WHERE is_active = 1) AS total_employees,
+                    COALESCE(SUM(success = 1), 0) AS today_logins,
+                    COALESCE(SUM(success = 0), 0) AS failed_attempts
+                FROM login_logs
+                WHERE login_time >= DATE('now', 'start of day')
+            ''')
+            counts = cursor.fetchone()
+            
+            # Most recent login
+            cursor.execute('''
+                SELECT ll.login_time, e.name 
+                FROM login_logs ll
+                JOIN employees e ON ll.employee_id = e.employee_id
+                WHERE ll.success = 1
+                ORDER BY ll.login_time DESC
+                LIMIT 1
+            ''')
+            recent_login = cursor.fetchone()
+            
+            return {
+                'total_employees': counts['total_employees'],
+                'today_logins': counts['today_logins'],
+                'failed_attempts': counts['failed_attempts'],
+                'recent_login': dict(recent_login) if recent_login else None
+            }
     
     def close(self):
-        """Close database connection (cleanup method)"""
-        pass  # SQLite connections are closed after each operation
+        """Flush queued login attempts and close the idle pooled connections"""
+        self.flush_login_logs()
+        
+        # Take every idle slot out before refilling, or the LIFO queue would hand the
+        # first emptied slot straight back
+        idle = []
+        while True:
+            try:
+                idle.append(self._pool.get_nowait())
+            except queue.Empty:
+                break  # The rest are borrowed and go back to the pool open
+        
+        for conn in idle:
+            if conn is not None:
+                conn.close()
+            self._pool.put(None)
 
 # Initialize database when module is imported
 if __name__ == "__main__":
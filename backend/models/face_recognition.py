@@ -1,19 +1,118 @@
 import cv2
 import numpy as np
 import os
-import json
-from typing import Optional, Tuple, List
+from typing import Optional, Tuple, List, Union, NamedTuple, Any
 import base64
-from PIL import Image
-import io
+import hashlib
+import queue
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from . import quantization
+except ImportError:  # run directly as a script
+    import quantization
+
+try:
+    import faiss
+except ImportError:  # faiss is optional; recognition falls back to the NumPy matrix search
+    faiss = None
+
+try:
+    import numba
+except ImportError:  # numba is optional; without faiss the gallery is scored with NumPy
+    numba = None
+
+if numba is not None:
+    # Serial on purpose: parallel=True kernels called from several request threads at once
+    # abort under numba's default workqueue threading layer. nogil lets concurrent logins
+    # still scan in parallel, one thread each.
+    @numba.njit(nogil=True, fastmath=True, cache=True)
+    def best_match(gallery: np.ndarray, scales: np.ndarray,
+                   probe: np.ndarray, probe_scale: float) -> Tuple[int, float]:
+        """Index and similarity of the int8 gallery row closest to the int8 probe (-1 if empty)"""
+        # Compiled code does no bounds checking, so reject mismatched shapes up front
+        if gallery.shape[1] != probe.shape[0] or gallery.shape[0] != scales.shape[0]:
+            raise ValueError("gallery, scales and probe shapes do not match")
+        best_index = -1
+        best_similarity = -3.0e38
+        for i in range(gallery.shape[0]):
+            dot = np.int32(0)
+            for j in range(gallery.shape[1]):
+                dot += np.int32(gallery[i, j]) * np.int32(probe[j])
+            similarity = dot * scales[i] * probe_scale
+            if similarity > best_similarity:
+                best_index = i
+                best_similarity = similarity
+        return best_index, best_similarity
+else:
+    best_match = None
+
+class KnownFaces(NamedTuple):
+    """One consistent version of the known-face gallery; replaced as a whole, never mutated"""
+    matrix_i8: np.ndarray      # (N, D) int8 encodings, row ~= q * scale
+    scales: np.ndarray         # (N,) float32 per-row scales
+    employee_ids: np.ndarray   # (N,) employee id of each row
+    index: Any = None          # faiss index over the same rows (when faiss is installed)
+
+EMPTY_GALLERY = KnownFaces(np.empty((0, 0), dtype=np.int8), np.empty(0, dtype=np.float32),
+                           np.empty(0, dtype=str))
+
+class ModelPool:
+    """Bounded pool of OpenCV models that threads must not use at the same time"""
+    
+    def __init__(self, factory, size: int):
+        self._factory = factory
+        # Slots start empty (None) and are loaded on first use, most recently returned first
+        self._models = queue.LifoQueue()
+        for _ in range(size):
+            self._models.put(None)
+    
+    @contextmanager
+    def borrow(self):
+        """Borrow a model, waiting while all of them are in use"""
+        model = self._models.get()
+        try:
+            if model is None:
+                model = self._factory()
+            yield model
+        finally:
+            self._models.put(model)
 
 class FaceRecognitionSystem:
     """Core face recognition system using OpenCV"""
     
-    def __init__(self, tolerance: float = 0.6):
+    def __init__(self, tolerance: float = 0.9, embedding_model_path: Optional[str] = None,
+                 detector_model_path: Optional[str] = None, match_threads: Optional[int] = None):
         self.tolerance = tolerance
-        self.known_encodings = []
-        self.known_employee_ids = []
+        
+        # Known encodings stacked row-wise as int8 with a per-row scale (row ~= q * scale),
+        # so matching is a single matrix-vector product over a quarter of the float32 bytes.
+        # Writers build a new snapshot and publish it in one assignment, so a matcher that
+        # reads self._gallery once always sees matching rows, scales, ids and index.
+        self._gallery = EMPTY_GALLERY
+        self._gallery_write_lock = threading.Lock()  # Serializes add/remove/load
+        self._faiss_lock = threading.Lock()  # FAISS indexes can't be searched while being added to
+        
+        # Without faiss, galleries of at least parallel_match_rows are scored in row blocks
+        # on match_threads threads (NumPy's einsum releases the GIL)
+        self.match_threads = match_threads if match_threads is not None else (os.cpu_count() or 1)
+        self.parallel_match_rows = 16384
+        
+        # With faiss, adding a face rebuilds (and retrains) the index up to this many rows
+        self.faiss_retrain_rows = 1024
+        self._match_pool = ThreadPoolExecutor(self.match_threads) if self.match_threads > 1 else None
+        
+        # Per-thread scratch buffer that oversized uploads are resized into
+        self.max_image_dim = 1280
+        
+        # Face detection runs on a copy shrunk so its longest side is at most this
+        self.detection_max_dim = 480
+        self._tls = threading.local()
+        
+        # Most copies of each DNN model loaded at once; request threads share them
+        self.model_pool_size = os.cpu_count() or 1
         
         # Initialize OpenCV face detection
         self.face_cascade = cv2.CascadeClassifier(
@@ -23,79 +122,346 @@ class FaceRecognitionSystem:
             cv2.data.haarcascades + 'haarcascade_eye.xml'
         )
         
+        # Optional YuNet DNN face detector; the Haar cascade is used when the model is missing
+        self.detector_model_path = None
+        if detector_model_path and os.path.exists(detector_model_path):
+            try:
+                self._face_detectors = ModelPool(
+                    lambda: self._create_face_detector(detector_model_path), self.model_pool_size)
+                with self._face_detectors.borrow():
+                    pass  # Load one now so a bad model file falls back to Haar at startup
+                self.detector_model_path = detector_model_path
+                print(f"✅ Loaded YuNet face detector from {detector_model_path}")
+            except Exception as e:
+                print(f"⚠️ Could not load YuNet face detector, using Haar cascade: {e}")
+        
         # Initialize face recognizer
         self.face_recognizer = cv2.face.LBPHFaceRecognizer_create()
         self.is_trained = False
         
+        # Optional ONNX face embedding network (e.g. MobileFaceNet); without it faces are
+        # encoded as normalized 100x100 grayscale pixels
+        self.embedding_model_path = None
+        self.encoding_dim = 100 * 100
+        if embedding_model_path and os.path.exists(embedding_model_path):
+            try:
+                self._embedding_nets = ModelPool(
+                    lambda: cv2.dnn.readNetFromONNX(embedding_model_path), self.model_pool_size)
+                self.embedding_model_path = embedding_model_path
+                probe = np.zeros((self.embedding_size, self.embedding_size, 3), dtype=np.uint8)
+                self.encoding_dim = self.embed_face(probe).shape[0]
+                print(f"✅ Loaded face embedding model ({self.encoding_dim}-D) from {embedding_model_path}")
+            except Exception as e:
+                self.embedding_model_path = None
+                print(f"⚠️ Could not load face embedding model, using pixel encodings: {e}")
+        
         print("✅ Face Recognition System initialized")
     
-    def detect_faces(self, image: np.ndarray) -> List[Tuple[int, int, int, int]]:
-        """Detect faces in an image using OpenCV Haar Cascades"""
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    @staticmethod
+    def _create_face_detector(model_path: str):
+        """Create a YuNet detector (input size is set per image)"""
+        return cv2.FaceDetectorYN.create(model_path, "", (0, 0))
+    
+    def detect_faces(self, image: np.ndarray, gray: Optional[np.ndarray] = None) -> np.ndarray:
+        """Detect faces in an image using YuNet when available, otherwise OpenCV Haar Cascades
+        
+        Returns an (N, 4) int array of (x, y, w, h) boxes.
+        """
+        # Detect on a downsized copy; detection cost grows with the pixel count
+        scale = min(1.0, self.detection_max_dim / max(image.shape[:2]))
+        
+        if self.detector_model_path is not None:
+            faces = self._detect_faces_yunet(image, scale)
+        else:
+            if gray is None:
+                gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            if scale < 1.0:
+                gray = cv2.resize(gray, (0, 0), fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            
+            # Keep the 50px full-resolution minimum face size on the shrunken copy
+            min_size = max(1, int(round(50 * scale)))
+            faces = self.face_cascade.detectMultiScale(
+                gray,
+                scaleFactor=1.1,
+                minNeighbors=5,
+                minSize=(min_size, min_size),
+                flags=cv2.CASCADE_SCALE_IMAGE
+            )
         
-        faces = self.face_cascade.detectMultiScale(
-            gray,
-            scaleFactor=1.1,
-            minNeighbors=5,
-            minSize=(50, 50),
-            flags=cv2.CASCADE_SCALE_IMAGE
-        )
+        if len(faces) == 0:
+            return np.empty((0, 4), dtype=int)
         
-        return faces.tolist()
+        # Map boxes back to full-resolution coordinates
+        return np.round(np.asarray(faces) / scale).astype(int)
     
-    def extract_face_features(self, image: np.ndarray, face_location: Tuple[int, int, int, int]) -> np.ndarray:
+    def _detect_faces_yunet(self, image: np.ndarray, scale: float) -> np.ndarray:
+        """Run YuNet on the BGR image shrunk by scale and return (x, y, w, h) boxes"""
+        if scale < 1.0:
+            image = cv2.resize(image, (0, 0), fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        
+        # setInputSize mutates the detector, so each call borrows one to itself
+        height, width = image.shape[:2]
+        with self._face_detectors.borrow() as detector:
+            detector.setInputSize((width, height))
+            _, detections = detector.detect(image)
+        
+        if detections is None:
+            return np.empty((0, 4), dtype=np.float32)
+        
+        # Boxes can start slightly outside the frame
+        boxes = detections[:, :4].copy()
+        boxes[:, :2] = np.maximum(boxes[:, :2], 0)
+        return boxes
+    
+    def extract_face_features(self, image: np.ndarray, face_location: Tuple[int, int, int, int],
+                              gray: Optional[np.ndarray] = None) -> np.ndarray:
         """Extract face features using Local Binary Patterns"""
         x, y, w, h = face_location
         
         # Extract face region
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        if gray is None:
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
         face_roi = gray[y:y+h, x:x+w]
         
         # Resize face to standard size
         face_roi = cv2.resize(face_roi, (100, 100))
         
-        # Enhance image quality
-        face_roi = cv2.equalizeHist(face_roi)
+        # Enhance image quality (in place; the resized crop is already a fresh array)
+        cv2.equalizeHist(face_roi, dst=face_roi)
         
         return face_roi
     
-    def encode_face(self, image: np.ndarray) -> Optional[np.ndarray]:
-        """Create face encoding from image"""
-        faces = self.detect_faces(image)
-        
-        if len(faces) == 0:
-            return None
+    def encode_face(self, image: np.ndarray, gray: Optional[np.ndarray] = None,
+                    face_location: Optional[Tuple[int, int, int, int]] = None) -> Optional[np.ndarray]:
+        """Create face encoding from image (detecting the face unless face_location is given)"""
+        if gray is None:
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        
+        if face_location is None:
+            faces = self.detect_faces(image, gray)
+            
+            if len(faces) == 0:
+                return None
+            
+            # Use the largest face detected
+            face_location = faces[int(np.argmax(faces[:, 2] * faces[:, 3]))]
         
-        # Use the largest face detected
-        largest_face = max(faces, key=lambda face: face[2] * face[3])
+        if self.embedding_model_path is not None:
+            x, y, w, h = face_location
+            return self.embed_face(image[y:y+h, x:x+w])
         
         # Extract features
-        face_features = self.extract_face_features(image, largest_face)
-        
-        # Convert to feature vector (flatten the image)
-        face_encoding = face_features.flatten()
+        face_features = self.extract_face_features(image, face_location, gray)
         
-        # Normalize the encoding
-        face_encoding = face_encoding / np.linalg.norm(face_encoding)
+        # Cast the pixels straight into the float32 feature vector, then normalize in place
+        # (no float64 temporaries from np.linalg.norm and the division)
+        face_encoding = np.empty(face_features.size, dtype=np.float32)
+        np.copyto(face_encoding, face_features.reshape(-1), casting='unsafe')
+        face_encoding *= 1.0 / np.sqrt(np.dot(face_encoding, face_encoding))
         
         return face_encoding
     
+    # Input side length expected by the embedding network
+    embedding_size = 112
+    
+    def embed_face(self, face_image: np.ndarray) -> np.ndarray:
+        """Run a BGR face crop through the embedding network and L2-normalize the output"""
+        blob = cv2.dnn.blobFromImage(face_image, scalefactor=1 / 127.5,
+                                     size=(self.embedding_size, self.embedding_size),
+                                     mean=(127.5, 127.5, 127.5), swapRB=True)
+        # setInput/forward share the net's buffers, so each call borrows a net to itself
+        with self._embedding_nets.borrow() as net:
+            net.setInput(blob)
+            embedding = net.forward().ravel().astype(np.float32)
+        return embedding / np.linalg.norm(embedding)
+    
     def compare_faces(self, known_encoding: np.ndarray, unknown_encoding: np.ndarray) -> float:
         """Compare two face encodings and return similarity score"""
-        # Calculate Euclidean distance
-        distance = np.linalg.norm(known_encoding - unknown_encoding)
+        # Encodings are L2-normalized, so the dot product is the cosine similarity
+        return float(np.dot(known_encoding, unknown_encoding))
+    
+    @property
+    def known_employee_ids(self) -> List[str]:
+        return self._gallery.employee_ids.tolist()
+    
+    @property
+    def known_matrix_i8(self) -> np.ndarray:
+        return self._gallery.matrix_i8
+    
+    @property
+    def known_scales(self) -> np.ndarray:
+        return self._gallery.scales
+    
+    @property
+    def faiss_ids(self) -> np.ndarray:
+        return self._gallery.employee_ids
+    
+    @property
+    def faiss_index(self):
+        return self._gallery.index
+    
+    def load_known_faces(self, encodings: Union[np.ndarray, List[np.ndarray]], employee_ids: List[str],
+                         index_path: Optional[str] = None, scales: Optional[np.ndarray] = None):
+        """Load known face encodings (an (N, D) matrix or a list of N vectors)
+        
+        If scales is given, encodings are already int8-quantized (row ~= q * scale).
+        """
+        matrix = None
+        
+        if len(encodings) == 0:
+            matrix_i8, row_scales = EMPTY_GALLERY.matrix_i8, EMPTY_GALLERY.scales
+        elif scales is not None:
+            matrix_i8 = np.ascontiguousarray(encodings, dtype=np.int8)
+            row_scales = np.asarray(scales, dtype=np.float32)
+        else:
+            matrix = np.ascontiguousarray(encodings, dtype=np.float32)
+            matrix_i8, row_scales = FaceRecognitionUtils.quantize_encodings(matrix)
+        
+        ids = np.array(employee_ids) if len(employee_ids) > 0 else EMPTY_GALLERY.employee_ids
+        
+        with self._gallery_write_lock:
+            index = self._build_faiss_index(matrix_i8, row_scales, ids, index_path, matrix)
+            self._gallery = KnownFaces(matrix_i8, row_scales, ids, index)
+        
+        if faiss is None and best_match is not None:
+            # Compile (or load the cached) kernel now instead of on the first login
+            best_match(np.zeros((1, 1), dtype=np.int8), np.ones(1, dtype=np.float32),
+                       *FaceRecognitionUtils.quantize(np.ones(1, dtype=np.float32)))
         
-        # Convert distance to similarity (0-1 scale, higher = more similar)
-        similarity = 1 / (1 + distance)
+        print(f"✅ Loaded {len(encodings)} known face encodings")
+    
+    def add_encoding(self, employee_id: str, encoding: np.ndarray):
+        """Add a single known face without reloading the whole gallery"""
+        row = np.ascontiguousarray(encoding, dtype=np.float32).reshape(1, -1)
+        row_i8, row_scale = FaceRecognitionUtils.quantize_encodings(row)
         
-        return similarity
+        with self._gallery_write_lock:
+            gallery = self._gallery
+            
+            if len(gallery.employee_ids) == 0:
+                matrix_i8 = row_i8
+            else:
+                matrix_i8 = np.vstack([gallery.matrix_i8, row_i8])
+            scales = np.append(gallery.scales, row_scale)
+            ids = np.append(gallery.employee_ids, employee_id)
+            
+            index = gallery.index
+            if faiss is not None and (index is None or len(ids) <= self.faiss_retrain_rows):
+                # Refit the quantizer ranges to the whole gallery while a rebuild is cheap
+                index = self._build_faiss_index(matrix_i8, scales, ids)
+                self._gallery = KnownFaces(matrix_i8, scales, ids, index)
+            elif faiss is not None:
+                # The index is shared with matchers, so grow it and publish under the search lock
+                with self._faiss_lock:
+                    index.add(row)
+                    self._gallery = KnownFaces(matrix_i8, scales, ids, index)
+            else:
+                self._gallery = KnownFaces(matrix_i8, scales, ids)
+    
+    def replace_encoding(self, employee_id: str, encoding: np.ndarray):
+        """Swap an employee's known face in place (re-enrollment), keeping the gallery order"""
+        row = np.ascontiguousarray(encoding, dtype=np.float32).reshape(1, -1)
+        row_i8, row_scale = FaceRecognitionUtils.quantize_encodings(row)
+        
+        with self._gallery_write_lock:
+            gallery = self._gallery
+            match = gallery.employee_ids == employee_id
+            
+            if match.any():
+                matrix_i8 = gallery.matrix_i8.copy()
+                matrix_i8[match] = row_i8[0]
+                scales = gallery.scales.copy()
+                scales[match] = row_scale[0]
+                
+                # HNSW entries can't be updated, so build a fresh index
+                index = self._build_faiss_index(matrix_i8, scales, gallery.employee_ids)
+                self._gallery = KnownFaces(matrix_i8, scales, gallery.employee_ids, index)
+                return
+        
+        # Not in the gallery yet (e.g. skipped at load for coming from another encoder)
+        self.add_encoding(employee_id, encoding)
+    
+    def remove_encoding(self, employee_id: str):
+        """Remove every known face belonging to an employee"""
+        with self._gallery_write_lock:
+            gallery = self._gallery
+            keep = gallery.employee_ids != employee_id
+            
+            if keep.all():
+                return
+            
+            matrix_i8 = np.ascontiguousarray(gallery.matrix_i8[keep])
+            scales = gallery.scales[keep]
+            ids = gallery.employee_ids[keep]
+            
+            # HNSW graphs do not support deletion, so build a fresh index; matchers keep
+            # using the old one until the new snapshot is published
+            index = self._build_faiss_index(matrix_i8, scales, ids)
+            self._gallery = KnownFaces(matrix_i8, scales, ids, index)
     
-    def load_known_faces(self, encodings: List[np.ndarray], employee_ids: List[str]):
-        """Load known face encodings"""
-        self.known_encodings = encodings
-        self.known_employee_ids = employee_ids
+    def _build_faiss_index(self, matrix_i8: np.ndarray, scales: np.ndarray, ids: np.ndarray,
+                           index_path: Optional[str] = None, matrix: Optional[np.ndarray] = None):
+        """Build (or reuse a persisted) HNSW index over the given gallery rows"""
+        if faiss is None or len(ids) == 0:
+            return None
         
-        print(f"✅ Loaded {len(encodings)} known face encodings")
+        # Reuse the persisted index if it was written for exactly these rows, in this order
+        digest_path = f"{index_path}.digest" if index_path else None
+        if digest_path and os.path.exists(index_path) and os.path.exists(digest_path):
+            try:
+                with open(digest_path) as f:
+                    saved_digest = f.read().strip()
+                if saved_digest == self._gallery_digest(matrix_i8, scales, ids):
+                    index = faiss.read_index(index_path)
+                    if (isinstance(index, faiss.IndexHNSWSQ)
+                            and index.metric_type == faiss.METRIC_INNER_PRODUCT):
+                        print(f"✅ Loaded face index from {index_path}")
+                        return index
+            except Exception as e:
+                print(f"⚠️ Could not read face index, rebuilding: {e}")
+        
+        if matrix is None:
+            matrix = matrix_i8 * scales[:, None]
+        
+        matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        
+        # HNSW graph over 8-bit scalar-quantized vectors: one byte per dimension, with the
+        # per-dimension ranges trained on the gallery (widened so later faces aren't clipped)
+        index = faiss.IndexHNSWSQ(matrix.shape[1], faiss.ScalarQuantizer.QT_8bit, 32,
+                                  faiss.METRIC_INNER_PRODUCT)
+        quantizer = faiss.downcast_index(index.storage).sq
+        quantizer.rangestat = faiss.ScalarQuantizer.RS_minmax
+        quantizer.rangestat_arg = 0.2
+        index.train(matrix)
+        index.add(matrix)
+        return index
+    
+    @staticmethod
+    def _gallery_digest(matrix_i8: np.ndarray, scales: np.ndarray, ids: np.ndarray) -> str:
+        """Hash of the gallery rows, in order, that a persisted index was built from"""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update('\0'.join(ids.tolist()).encode())
+        digest.update(np.ascontiguousarray(matrix_i8).tobytes())
+        digest.update(np.ascontiguousarray(scales, dtype=np.float32).tobytes())
+        return digest.hexdigest()
+    
+    def save_faiss_index(self, index_path: str) -> bool:
+        """Persist the HNSW index and the digest of the gallery it indexes"""
+        with self._faiss_lock:
+            gallery = self._gallery
+            if gallery.index is None:
+                return False
+            
+            try:
+                os.makedirs(os.path.dirname(index_path) or '.', exist_ok=True)
+                faiss.write_index(gallery.index, index_path)
+                with open(f"{index_path}.digest", 'w') as f:
+                    f.write(self._gallery_digest(gallery.matrix_i8, gallery.scales,
+                                                 gallery.employee_ids))
+                return True
+            except Exception as e:
+                print(f"❌ Error saving face index: {e}")
+                return False
     
     def train_recognizer(self, faces: List[np.ndarray], labels: List[int]):
         """Train the face recognizer with face images and labels"""
@@ -114,56 +480,144 @@ class FaceRecognitionSystem:
     
     def recognize_face(self, image: np.ndarray) -> Tuple[Optional[str], float]:
         """Recognize face in image and return employee_id and confidence"""
+        # Convert to grayscale once for detection and encoding
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        
         # Detect faces in image
-        faces = self.detect_faces(image)
+        faces = self.detect_faces(image, gray)
         
         if len(faces) == 0:
             return None, 0.0
         
         # Use the largest face
-        largest_face = max(faces, key=lambda face: face[2] * face[3])
+        largest_face = faces[int(np.argmax(faces[:, 2] * faces[:, 3]))]
         
         # Extract face encoding
-        unknown_encoding = self.encode_face(image)
+        unknown_encoding = self.encode_face(image, gray, largest_face)
+        
+        return self.match_encoding(unknown_encoding)
+    
+    def analyze_face(self, image: np.ndarray) -> Tuple[bool, str, Optional[np.ndarray]]:
+        """Validate face quality and encode the face (encoding is None if either step fails)"""
+        # Convert to grayscale and detect once for validation and encoding
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        faces = self.detect_faces(image, gray)
+        
+        is_valid, quality_message = self.validate_face_quality(image, faces, gray)
+        
+        if not is_valid:
+            return False, quality_message, None
         
+        # A valid image has exactly one face
+        return True, quality_message, self.encode_face(image, gray, faces[0])
+    
+    def match_encoding(self, unknown_encoding: Optional[np.ndarray]) -> Tuple[Optional[str], float]:
+        """Match a face encoding against the known faces and return employee_id and confidence"""
         if unknown_encoding is None:
             return None, 0.0
         
-        # Compare with known faces
-        best_match = None
-        best_confidence = 0.0
-        
-        for i, known_encoding in enumerate(self.known_encodings):
-            confidence = self.compare_faces(known_encoding, unknown_encoding)
+        probe = unknown_encoding.astype(np.float32)
+        
+        # Encodings are L2-normalized, so the dot product is the cosine similarity
+        if faiss is not None:
+            # Inner-product HNSW search returns the similarity of the nearest neighbour;
+            # read the snapshot under the lock so the ids match the index being searched
+            with self._faiss_lock:
+                gallery = self._gallery
+                if gallery.index is None:
+                    return None, 0.0
+                similarities, indices = gallery.index.search(probe[None, :], 1)
+            best_index = int(indices[0, 0])
+            if best_index < 0:
+                return None, 0.0
+            best_confidence = float(similarities[0, 0])
+        else:
+            gallery = self._gallery
+            if len(gallery.employee_ids) == 0:
+                return None, 0.0
             
-            if confidence > best_confidence and confidence > self.tolerance:
-                best_confidence = confidence
-                best_match = self.known_employee_ids[i]
-        
-        return best_match, best_confidence
+            probe_i8, probe_scale = FaceRecognitionUtils.quantize(probe)
+            if best_match is not None:
+                # Compiled single-pass scan that never materializes the score vector
+                best_index, best_confidence = best_match(gallery.matrix_i8, gallery.scales,
+                                                         probe_i8, probe_scale)
+                best_index, best_confidence = int(best_index), float(best_confidence)
+                if best_index < 0:
+                    return None, 0.0
+            else:
+                similarities = self._score_gallery(gallery, probe_i8, probe_scale)
+                best_index = int(np.argmax(similarities))
+                best_confidence = float(similarities[best_index])
+        
+        # Quantization can nudge a self-match just past 1.0
+        best_confidence = min(best_confidence, 1.0)
+        
+        if best_confidence > self.tolerance:
+            return str(gallery.employee_ids[best_index]), best_confidence
+        
+        return None, 0.0
+    
+    def _score_gallery(self, gallery: KnownFaces, probe_i8: np.ndarray, probe_scale: float) -> np.ndarray:
+        """Similarity of the quantized probe to every face in a gallery snapshot"""
+        rows = len(gallery.matrix_i8)
+        if self._match_pool is None or rows < self.parallel_match_rows:
+            return FaceRecognitionUtils.dequant_dot(gallery.matrix_i8, probe_i8,
+                                                    gallery.scales, probe_scale)
+        
+        bounds = np.linspace(0, rows, self.match_threads + 1, dtype=int)
+        blocks = self._match_pool.map(
+            lambda start, stop: FaceRecognitionUtils.dequant_dot(
+                gallery.matrix_i8[start:stop], probe_i8, gallery.scales[start:stop], probe_scale),
+            bounds[:-1], bounds[1:]
+        )
+        return np.concatenate(list(blocks))
     
     def process_image_from_base64(self, base64_string: str) -> np.ndarray:
         """Convert base64 string to OpenCV image"""
         try:
             # Remove data URL prefix if present
-            if ',' in base64_string:
-                base64_string = base64_string.split(',')[1]
+            header, separator, payload = base64_string.partition(',')
+            if not separator:
+                payload = header
             
-            # Decode base64 to bytes
-            image_bytes = base64.b64decode(base64_string)
+            # Decode base64 and view the bytes as uint8 without copying
+            image_bytes = base64.b64decode(payload, validate=False)
+            buffer = np.frombuffer(image_bytes, dtype=np.uint8)
             
-            # Convert bytes to PIL Image
-            pil_image = Image.open(io.BytesIO(image_bytes))
+            # Decode straight to BGR (OpenCV's JPEG/PNG decoders are SIMD accelerated)
+            opencv_image = cv2.imdecode(buffer, cv2.IMREAD_COLOR)
             
-            # Convert PIL to OpenCV format
-            opencv_image = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
+            if opencv_image is None:
+                print("❌ Error processing base64 image: could not decode image data")
+                return None
             
-            return opencv_image
+            return self._fit_to_buffer(opencv_image)
             
         except Exception as e:
             print(f"❌ Error processing base64 image: {e}")
             return None
     
+    def _fit_to_buffer(self, image: np.ndarray) -> np.ndarray:
+        """Shrink oversized images into this thread's reusable buffer.
+        
+        The returned view is only valid until the same thread processes its next image.
+        """
+        height, width = image.shape[:2]
+        if max(height, width) <= self.max_image_dim:
+            return image
+        
+        scale = self.max_image_dim / max(height, width)
+        new_width, new_height = int(width * scale), int(height * scale)
+        
+        buffer = getattr(self._tls, 'img_buf', None)
+        if buffer is None:
+            buffer = np.empty((self.max_image_dim, self.max_image_dim, 3), dtype=np.uint8)
+            self._tls.img_buf = buffer
+        
+        resized = buffer[:new_height, :new_width]
+        cv2.resize(image, (new_width, new_height), dst=resized, interpolation=cv2.INTER_AREA)
+        return resized
+    
     def process_image_from_file(self, file_path: str) -> np.ndarray:
         """Load image from file path"""
         try:
@@ -176,9 +630,14 @@ class FaceRecognitionSystem:
             print(f"❌ Error loading image: {e}")
             return None
     
-    def validate_face_quality(self, image: np.ndarray) -> Tuple[bool, str]:
-        """Validate if the face in image is of good quality for recognition"""
-        faces = self.detect_faces(image)
+    def validate_face_quality(self, image: np.ndarray, faces: Optional[np.ndarray] = None,
+                              gray: Optional[np.ndarray] = None) -> Tuple[bool, str]:
+        """Validate if the face in image is of good quality for recognition (reusing faces if given)"""
+        if gray is None:
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        
+        if faces is None:
+            faces = self.detect_faces(image, gray)
         
         if len(faces) == 0:
             return False, "No face detected in image"
@@ -199,8 +658,7 @@ class FaceRecognitionSystem:
             return False, "Face shape is unusual. Please face the camera directly"
         
         # Extract face region for eye detection
-        face_roi = image[y:y+h, x:x+w]
-        gray_roi = cv2.cvtColor(face_roi, cv2.COLOR_BGR2GRAY)
+        gray_roi = gray[y:y+h, x:x+w]
         
         # Detect eyes to ensure face is frontal
         eyes = self.eye_cascade.detectMultiScale(gray_roi, 1.1, 3)
@@ -210,21 +668,13 @@ class FaceRecognitionSystem:
         
         return True, "Face quality is good"
     
-    def save_face_encoding(self, employee_id: str, encoding: np.ndarray, file_path: str = "face_encodings.json"):
-        """Save face encoding to file"""
+    def save_face_encoding(self, employee_id: str, encoding: np.ndarray, file_path: str = "face_encodings"):
+        """Save face encoding to <file_path>/<employee_id>.npy"""
         try:
-            # Load existing encodings
-            encodings_data = {}
-            if os.path.exists(file_path):
-                with open(file_path, 'r') as f:
-                    encodings_data = json.load(f)
-            
-            # Add new encoding
-            encodings_data[employee_id] = encoding.tolist()
-            
-            # Save back to file
-            with open(file_path, 'w') as f:
-                json.dump(encodings_data, f, indent=2)
+            # One file per employee, so saving never rewrites the other encodings
+            os.makedirs(file_path, exist_ok=True)
+            np.save(os.path.join(file_path, f"{employee_id}.npy"),
+                    np.asarray(encoding, dtype=np.float32))
             
             print(f"✅ Face encoding saved for employee {employee_id}")
             return True
@@ -233,21 +683,21 @@ class FaceRecognitionSystem:
             print(f"❌ Error saving face encoding: {e}")
             return False
     
-    def load_face_encodings(self, file_path: str = "face_encodings.json"):
-        """Load face encodings from file"""
+    def load_face_encodings(self, file_path: str = "face_encodings"):
+        """Load face encodings from the .npy files in a directory"""
         try:
-            if not os.path.exists(file_path):
-                print("⚠️ No face encodings file found")
+            if not os.path.isdir(file_path):
+                print("⚠️ No face encodings directory found")
                 return False
             
-            with open(file_path, 'r') as f:
-                encodings_data = json.load(f)
-            
             encodings = []
             employee_ids = []
             
-            for emp_id, encoding_list in encodings_data.items():
-                encodings.append(np.array(encoding_list))
+            for file_name in sorted(os.listdir(file_path)):
+                emp_id, extension = os.path.splitext(file_name)
+                if extension != '.npy':
+                    continue
+                encodings.append(np.load(os.path.join(file_path, file_name)))
                 employee_ids.append(emp_id)
             
             self.load_known_faces(encodings, employee_ids)
@@ -274,7 +724,7 @@ class FaceRecognitionSystem:
     
     def update_tolerance(self, new_tolerance: float):
         """Update recognition tolerance"""
-        self.tolerance = max(0.0, min(1.0, new_tolerance))  # Keep between 0 and 1
+        self.tolerance = max(-1.0, min(1.0, new_tolerance))  # Cosine similarity range
         print(f"✅ Recognition tolerance updated to {self.tolerance}")
 
 # Utility functions for the face recognition system
@@ -300,6 +750,11 @@ class FaceRecognitionUtils:
         
         return image
     
+    # int8 helpers live in the NumPy-only quantization module
+    quantize_encodings = staticmethod(quantization.quantize_encodings)
+    quantize = staticmethod(quantization.quantize)
+    dequant_dot = staticmethod(quantization.dequant_dot)
+    
     @staticmethod
     def enhance_image(image: np.ndarray) -> np.ndarray:
         """Enhance image quality for better face recognition"""
@@ -324,6 +779,29 @@ class FaceRecognitionUtils:
         image_base64 = base64.b64encode(buffer).decode('utf-8')
         return f"data:image/jpeg;base64,{image_base64}"
 
+# Process-pool workers: each worker process owns a detector and only decodes and encodes
+# the probe; matching against the known faces stays in the parent process
+_worker_system = None
+
+def init_recognition_worker(tolerance: float = 0.9, embedding_model_path: Optional[str] = None,
+                            detector_model_path: Optional[str] = None):
+    """Initializer for recognition worker processes"""
+    global _worker_system
+    cv2.setNumThreads(1)  # The pool already provides the parallelism
+    _worker_system = FaceRecognitionSystem(tolerance=tolerance,
+                                           embedding_model_path=embedding_model_path,
+                                           detector_model_path=detector_model_path,
+                                           match_threads=1)  # Workers only encode
+
+def analyze_face_from_base64(base64_string: str) -> Optional[Tuple[bool, str, Optional[np.ndarray]]]:
+    """Decode, validate and encode a probe image inside a worker process"""
+    image = _worker_system.process_image_from_base64(base64_string)
+    
+    if image is None:
+        return None
+    
+    return _worker_system.analyze_face(image)
+
 # Test the face recognition system
 if __name__ == "__main__":
     # Initialize face recognition system
@@ -0,0 +1,24 @@
+import numpy as np
+from typing import Tuple
+
+# int8 face encoding helpers shared by the database and the recognizer; NumPy only, so
+# the database layer doesn't pull in OpenCV, faiss or numba
+
+def quantize_encodings(matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Quantize encoding rows to int8 with one scale per row (row ~= q * scale)"""
+    max_abs = np.abs(matrix).max(axis=1)
+    scales = np.where(max_abs > 0, max_abs / 127.0, 1.0).astype(np.float32)
+    quantized = np.round(matrix / scales[:, None]).astype(np.int8)
+    return quantized, scales
+
+def quantize(encoding: np.ndarray) -> Tuple[np.ndarray, float]:
+    """Quantize one encoding to int8 plus its scale (encoding ~= q * scale)"""
+    quantized, scales = quantize_encodings(np.asarray(encoding, dtype=np.float32).reshape(1, -1))
+    return quantized[0], float(scales[0])
+
+def dequant_dot(q_gallery: np.ndarray, q_probe: np.ndarray,
+                s_gallery: np.ndarray, s_probe: float) -> np.ndarray:
+    """Dot products of int8 gallery rows with an int8 probe, rescaled to float"""
+    # Accumulate in int32 so 127 * 127 * D cannot overflow
+    dots = np.einsum('ij,j->i', q_gallery, q_probe, dtype=np.int32)
+    return dots * (s_gallery * s_probe)
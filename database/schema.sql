@@ -3,7 +3,6 @@
 
 -- Drop tables if they exist (for clean setup)
 DROP TABLE IF EXISTS login_logs;
-DROP TABLE IF EXISTS face_encodings;
 DROP TABLE IF EXISTS admin_users;
 DROP TABLE IF EXISTS employees;
 
@@ -14,7 +13,9 @@ CREATE TABLE employees (
     name TEXT NOT NULL,
     email TEXT UNIQUE NOT NULL,
     department TEXT,
-    face_encoding TEXT,  -- JSON string of face encoding array
+    face_encoding BLOB,  -- int8 bytes of face encoding (value ~= q * encoding_scale)
+    encoding_scale REAL,  -- Per-encoding dequantization scale
+    encoding_hash TEXT,  -- Hash of face_encoding for duplicate detection
     photo_path TEXT,
     is_active BOOLEAN DEFAULT 1,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -34,16 +35,6 @@ CREATE TABLE login_logs (
     FOREIGN KEY (employee_id) REFERENCES employees (employee_id)
 );
 
--- Create face_encodings table (for faster face matching)
-CREATE TABLE face_encodings (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    employee_id TEXT NOT NULL,
-    encoding_data TEXT NOT NULL,  -- JSON array of face encoding
-    encoding_hash TEXT NOT NULL,  -- Hash for quick comparison
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    FOREIGN KEY (employee_id) REFERENCES employees (employee_id)
-);
-
 -- Create admin_users table
 CREATE TABLE admin_users (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -58,9 +49,9 @@ CREATE TABLE admin_users (
 CREATE INDEX idx_employees_employee_id ON employees(employee_id);
 CREATE INDEX idx_employees_email ON employees(email);
 CREATE INDEX idx_employees_is_active ON employees(is_active);
-CREATE INDEX idx_login_logs_employee_id ON login_logs(employee_id);
-CREATE INDEX idx_login_logs_login_time ON login_logs(login_time);
-CREATE INDEX idx_face_encodings_employee_id ON face_encodings(employee_id);
+CREATE INDEX idx_login_logs_emp_time ON login_logs(employee_id, login_time DESC);
+CREATE INDEX idx_login_logs_time ON login_logs(login_time);
+CREATE INDEX idx_employees_active_encoding_hash ON employees(encoding_hash) WHERE is_active = 1;
 
 -- Insert sample admin user (password: admin123)
 INSERT INTO admin_users (username, password_hash, email) VALUES 